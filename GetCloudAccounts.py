@@ -12,17 +12,24 @@ Arguments:
         - -or: Match ANY keyword (e.g., "-or SOC, PROD, DEV")
         - -and: Match ALL keywords (e.g., "-and SOC, Production")
     case_sensitive (bool): Optional. Default: false.
+    time_budget (int): Optional. Seconds the script may spend paginating before it
+        checkpoints and returns a partial result. Minimum 5. Default: no limit.
     debug (bool): Optional. Show debug info in output. Default: false.
 
 Output:
     Context path: GetCloudAccounts.values (list of cloud_account_id)
     Context path: GetCloudAccounts.account_names (list of account_name)
     Context path: GetCloudAccounts.instance_ids (list of instance IDs queried)
+    Context path: GetCloudAccounts.partial (true if the time budget ran out)
+    Context path: GetCloudAccounts.incomplete_instances (instances to resume on the next run)
 """
 
 import json
+import random
 import re
+import time
 import traceback
+import uuid
 
 
 # ============================================================================
@@ -31,21 +38,64 @@ import traceback
 
 PAGE_SIZE = 100
 
+# Single-flight coordination between concurrent runs (shared integration context)
+CONTEXT_KEY = "GetCloudAccounts"
+LEASE_TTL_SECONDS = 60          # Renewed after every page; a lease not renewed for this long is abandoned
+RESULT_TTL_SECONDS = 60         # Published results younger than this are reused
+LEASE_POLL_INTERVAL_SECONDS = 2
+CONTEXT_UPDATE_RETRIES = 10     # Versioned context writes retried on conflict
+
+# Deadline-aware pagination
+CHECKPOINT_TTL_SECONDS = 3600   # Checkpoints older than this are discarded and the fetch restarts
+PAGE_TIME_ESTIMATE_SECONDS = 5  # Minimum time_budget, enough for at least one page
+
 
 # ============================================================================
 # FUNCTIONS
 # ============================================================================
 
-def get_accounts_for_instance(instance_id: str, debug_info: list = None) -> list:
-    """Fetch all accounts for a specific integration instance with pagination."""
+def get_accounts_for_instance(instance_id: str, debug_info: list = None, checkpoint: dict = None,
+                              deadline: float = None, on_page=None) -> tuple:
+    """Fetch all accounts for a specific integration instance with pagination.
+
+    When a checkpoint is given, pagination resumes from its offset and accounts.
+    If the instance's TOTAL_COUNT changed since the checkpoint was taken, the
+    pages have shifted, so the checkpoint is discarded and pagination restarts.
+    Accounts are de-duplicated by cloud_account_id.
 
-    all_accounts = []
-    offset = 0
+    When a deadline is given, the remaining time is checked between pages and
+    pagination stops early if the next page is not expected to finish in time.
+    At least one page is always fetched, so every call makes progress.
+    If on_page is given, it is called without arguments after every page.
+
+    Returns:
+        tuple: (accounts, checkpoint) where checkpoint is None once all accounts
+            were fetched, or a dict with offset, accounts and total_count to
+            resume from otherwise.
+    """
+
+    checkpoint = checkpoint or {}
+    all_accounts = list(checkpoint.get('accounts') or [])
+    seen_ids = {acc.get('cloud_account_id') for acc in all_accounts}
+    offset = checkpoint.get('offset', 0)
+    expected_total = checkpoint.get('total_count')
+    total_count = 0
+    slowest_page = 0
+    pages = 0
 
     if debug_info is not None:
         debug_info.append(f"API Request URI: /public_api/v1/cloud_onboarding/get_accounts")
+        if offset:
+            debug_info.append(f"Resuming from offset {offset} with {len(all_accounts)} accounts already fetched")
 
     while True:
+        # Use the slowest page seen so far as the estimate for the next one
+        if pages and deadline is not None and time.time() + slowest_page > deadline:
+            if debug_info is not None:
+                debug_info.append(f"Time budget running low, stopping at offset {offset} after {pages} page(s)")
+            return all_accounts, {'offset': offset, 'accounts': all_accounts, 'total_count': total_count}
+
+        page_started = time.time()
         payload = {
             "request_data": {
                 "instance_id": instance_id,
@@ -79,10 +129,29 @@ def get_accounts_for_instance(instance_id: str, debug_info: list = None) -> list
         accounts = response.get('DATA', [])
         total_count = response.get('TOTAL_COUNT', 0)
 
-        if debug_info is not None and offset == 0:
+        if debug_info is not None and pages == 0:
             debug_info.append(f"Total accounts in instance: {total_count}")
 
-        all_accounts.extend(accounts)
+        slowest_page = max(slowest_page, time.time() - page_started)
+
+        if on_page is not None:
+            on_page()
+
+        if expected_total is not None and total_count != expected_total:
+            # Accounts were added or removed since the checkpoint, so offsets have shifted
+            if debug_info is not None:
+                debug_info.append(f"Total changed since checkpoint ({expected_total} -> {total_count}), restarting")
+            all_accounts, seen_ids, offset, expected_total = [], set(), 0, None
+            continue
+
+        expected_total = None
+        for acc in accounts:
+            account_id = acc.get('cloud_account_id')
+            if account_id and account_id in seen_ids:
+                continue
+            seen_ids.add(account_id)
+            all_accounts.append(acc)
+        pages += 1
 
         # Check if we've fetched all accounts
         if len(accounts) < PAGE_SIZE or len(all_accounts) >= total_count:
@@ -91,9 +160,260 @@ def get_accounts_for_instance(instance_id: str, debug_info: list = None) -> list
         offset += PAGE_SIZE
 
     if debug_info is not None:
-        debug_info.append(f"Pagination complete: fetched {len(all_accounts)} accounts in {(offset // PAGE_SIZE) + 1} page(s)")
+        debug_info.append(f"Pagination complete: fetched {len(all_accounts)} accounts in {pages} page(s)")
+
+    return all_accounts, None
+
+
+def compact_accounts(accounts: list) -> list:
+    """Keep only the account fields used downstream, to keep the shared context small."""
+    return [
+        {'cloud_account_id': acc.get('cloud_account_id'), 'account_name': acc.get('account_name')}
+        for acc in accounts
+    ]
+
+
+def prune_instance_state(state: dict) -> dict:
+    """Drop an expired lease, stale published result and stale checkpoint from an instance's state."""
+    now = time.time()
+    if state.get('lease', {}).get('expires', 0) <= now:
+        state.pop('lease', None)
+    if now - state.get('result', {}).get('published', 0) >= RESULT_TTL_SECONDS:
+        state.pop('result', None)
+    if now - state.get('checkpoint', {}).get('saved', 0) >= CHECKPOINT_TTL_SECONDS:
+        state.pop('checkpoint', None)
+    return state
+
+
+def load_instance_state(instance_id: str) -> dict:
+    """Load the shared state (lease, published result, checkpoint) of one instance."""
+    context = get_integration_context() or {}
+    state = (context.get(CONTEXT_KEY) or {}).get(instance_id) or {}
+    return prune_instance_state(dict(state))
+
+
+def update_instance_state(instance_id: str, update):
+    """Apply an update to one instance's shared state using a versioned write.
+
+    The update function receives the instance's state dict, modifies it in place
+    and returns a value that is passed back to the caller. On a version conflict
+    the context is reloaded and the update is applied again, so concurrent runs
+    never overwrite each other. Only this instance's key is changed.
+    """
+    for attempt in range(1, CONTEXT_UPDATE_RETRIES + 1):
+        context, version = get_integration_context(with_version=True)
+        context = context or {}
+        shared = dict(context.get(CONTEXT_KEY) or {})
+        state = prune_instance_state(dict(shared.get(instance_id) or {}))
+
+        result = update(state)
+
+        if state:
+            shared[instance_id] = state
+        else:
+            shared.pop(instance_id, None)
+        context[CONTEXT_KEY] = shared
+
+        try:
+            set_integration_context(context, version=version)
+            return result
+        except ValueError as ex:
+            demisto.debug(f"Context version conflict for instance {instance_id} (attempt {attempt}): {ex}")
+            time.sleep(random.uniform(0.05, 0.5))
+
+    raise DemistoException(f"Failed to update shared state for instance {instance_id}: too many version conflicts")
+
+
+def get_published_accounts(instance_id: str, not_before: float = 0):
+    """Return accounts published for an instance if still fresh, otherwise None."""
+    result = load_instance_state(instance_id).get('result')
+    if not result or result.get('published', 0) < not_before:
+        return None
+    return result.get('accounts', [])
+
+
+def acquire_lease(instance_id: str, run_id: str) -> bool:
+    """Try to take the fetch lease for an instance. Returns True if this run now holds it."""
+    def take(state):
+        lease = state.get('lease')
+        if lease and lease.get('owner') != run_id:
+            return False
+        state['lease'] = {'owner': run_id, 'expires': time.time() + LEASE_TTL_SECONDS}
+        return True
+
+    return update_instance_state(instance_id, take)
+
+
+def renew_lease(instance_id: str, run_id: str) -> bool:
+    """Extend the fetch lease held by this run. Returns False if the run no longer holds it."""
+    def renew(state):
+        if state.get('lease', {}).get('owner') != run_id:
+            return False
+        state['lease']['expires'] = time.time() + LEASE_TTL_SECONDS
+        return True
+
+    return update_instance_state(instance_id, renew)
+
+
+def release_lease(instance_id: str, run_id: str, accounts: list = None) -> None:
+    """Release the fetch lease and, if given, publish the accounts for waiting runs."""
+    def release(state):
+        if state.get('lease', {}).get('owner') == run_id:
+            state.pop('lease')
+        if accounts is not None:
+            state['result'] = {'accounts': compact_accounts(accounts), 'published': time.time()}
+
+    update_instance_state(instance_id, release)
 
-    return all_accounts
+
+def release_lease_safely(instance_id: str, run_id: str, accounts: list = None) -> None:
+    """Release the fetch lease, logging instead of raising if the shared state cannot be updated.
+
+    An unreleased lease expires on its own, so waiting runs eventually take over.
+    """
+    try:
+        release_lease(instance_id, run_id, accounts)
+    except Exception as ex:
+        demisto.debug(f"Failed to release lease for instance {instance_id}: {ex}")
+
+
+def is_lease_held(instance_id: str) -> bool:
+    """Check whether any run currently holds a live lease for the instance."""
+    return 'lease' in load_instance_state(instance_id)
+
+
+def fetch_accounts_directly(instance_id: str, deadline: float = None, debug_info: list = None) -> tuple:
+    """Fetch accounts for an instance without touching the shared state.
+
+    Used when coordination with other runs is not possible, so the script
+    still returns the same accounts it would without single-flight.
+
+    Returns:
+        tuple: (accounts, complete)
+    """
+    accounts, checkpoint = get_accounts_for_instance(instance_id, debug_info, deadline=deadline)
+    return accounts, checkpoint is None
+
+
+def fetch_accounts_with_checkpoint(instance_id: str, run_id: str, deadline: float = None,
+                                   debug_info: list = None, on_page=None) -> tuple:
+    """Fetch accounts for an instance, resuming from and saving pagination checkpoints.
+
+    Must only be called by the run holding the instance's lease. The checkpoint
+    is only saved while the run still holds it, so a run that lost the lease
+    cannot overwrite the new holder's progress. Failures to read or save the
+    checkpoint are logged and do not fail the fetch.
+
+    Returns:
+        tuple: (accounts, complete) where complete is False if the deadline
+            was reached and a checkpoint was saved for the next run.
+    """
+    try:
+        checkpoint = load_instance_state(instance_id).get('checkpoint')
+    except Exception as ex:
+        demisto.debug(f"Failed to load checkpoint for instance {instance_id}, starting over: {ex}")
+        checkpoint = None
+
+    accounts, next_checkpoint = get_accounts_for_instance(
+        instance_id, debug_info,
+        checkpoint=checkpoint,
+        deadline=deadline,
+        on_page=on_page
+    )
+
+    def save(state):
+        if state.get('lease', {}).get('owner') != run_id:
+            return False
+        if next_checkpoint is None:
+            state.pop('checkpoint', None)
+        else:
+            state['checkpoint'] = dict(next_checkpoint, accounts=compact_accounts(next_checkpoint['accounts']),
+                                       saved=time.time())
+        return True
+
+    if next_checkpoint is not None or checkpoint:
+        try:
+            saved = update_instance_state(instance_id, save)
+            if not saved:
+                demisto.debug(f"Lost the fetch lease for instance {instance_id}, checkpoint not saved")
+            elif next_checkpoint is not None and debug_info is not None:
+                debug_info.append(f"Saved checkpoint at offset {next_checkpoint['offset']} "
+                                  f"with {len(accounts)} accounts")
+        except Exception as ex:
+            demisto.debug(f"Failed to save checkpoint for instance {instance_id}: {ex}")
+
+    return accounts, next_checkpoint is None
+
+
+def fetch_accounts_single_flight(instance_id: str, run_id: str, deadline: float = None,
+                                 debug_info: list = None) -> tuple:
+    """Fetch accounts for an instance, coalescing with concurrent runs.
+
+    Reuses a freshly published result when available. Otherwise the run that
+    takes the lease fetches and publishes the accounts, renewing the lease after
+    every page. Other runs wait for that result as long as the lease is being
+    renewed, and take over the fetch if it expires. Only the lease holder reads
+    and writes the checkpoint. Partial results cut short by the deadline are
+    checkpointed but never published.
+    If the shared state cannot be read or written, the accounts are fetched
+    directly instead.
+
+    Returns:
+        tuple: (accounts, complete)
+    """
+    try:
+        accounts = get_published_accounts(instance_id)
+        if accounts is not None:
+            if debug_info is not None:
+                debug_info.append(f"Reusing {len(accounts)} accounts published by a concurrent run")
+            return accounts, True
+
+        lease_taken = acquire_lease(instance_id, run_id)
+        if not lease_taken:
+            if debug_info is not None:
+                debug_info.append("Another run holds the fetch lease, waiting for its result")
+
+            wait_started = time.time()
+            while deadline is None or time.time() < deadline:
+                time.sleep(LEASE_POLL_INTERVAL_SECONDS)
+                accounts = get_published_accounts(instance_id, not_before=wait_started)
+                if accounts is not None:
+                    if debug_info is not None:
+                        debug_info.append(f"Reusing {len(accounts)} accounts published by the lease holder")
+                    return accounts, True
+                if not is_lease_held(instance_id):
+                    # Holder stopped renewing or finished without publishing - try to take over
+                    lease_taken = acquire_lease(instance_id, run_id)
+                    if lease_taken:
+                        break
+    except Exception as ex:
+        demisto.debug(f"Single-flight coordination failed for instance {instance_id}: {ex}")
+        if debug_info is not None:
+            debug_info.append(f"Coordination with concurrent runs failed ({ex}), fetching directly")
+        return fetch_accounts_directly(instance_id, deadline, debug_info)
+
+    if not lease_taken:
+        if debug_info is not None:
+            debug_info.append("Time budget ran out waiting for the lease holder, fetching directly")
+        # Without the lease the checkpoint belongs to another run, so leave it alone
+        return fetch_accounts_directly(instance_id, deadline, debug_info)
+
+    def renew():
+        try:
+            if not renew_lease(instance_id, run_id):
+                demisto.debug(f"Lost the fetch lease for instance {instance_id} while paginating")
+        except Exception as ex:
+            demisto.debug(f"Failed to renew lease for instance {instance_id}: {ex}")
+
+    try:
+        accounts, complete = fetch_accounts_with_checkpoint(instance_id, run_id, deadline, debug_info,
+                                                           on_page=renew)
+    except Exception:
+        release_lease_safely(instance_id, run_id)
+        raise
+
+    release_lease_safely(instance_id, run_id, accounts if complete else None)
+    return accounts, complete
 
 
 def parse_filter(filter_arg: str) -> tuple:
@@ -205,7 +525,7 @@ def extract_account_names(accounts: list) -> list:
 
 def build_output(instance_ids: list, filter_keyword: str, case_sensitive: bool,
                  results_count: int, account_ids: list, account_names: list,
-                 debug_mode: bool = False) -> str:
+                 debug_mode: bool = False, incomplete_instances: list = None) -> str:
     """Build human-readable output for War Room."""
 
     case_mode = "case-sensitive" if case_sensitive else "case-insensitive"
@@ -219,6 +539,14 @@ def build_output(instance_ids: list, filter_keyword: str, case_sensitive: bool,
         f"**Results:** {results_count}\n"
     )
 
+    if incomplete_instances:
+        incomplete_display = ", ".join(f"`{iid}`" for iid in incomplete_instances)
+        output = (
+            f"### ⚠️ Partial Result - Time Budget Exceeded\n\n"
+            f"**Incomplete Instances:** {incomplete_display}\n"
+            f"Run the script again to resume from the saved checkpoint.\n\n"
+        ) + output
+
     if debug_mode and account_names:
         output += "\n### Account Names\n\n```\n"
         output += "\n".join(str(v) for v in account_names)
@@ -240,9 +568,11 @@ def main():
         filter_keyword = args.get('filter_keyword')
         case_sensitive = argToBoolean(args.get('case_sensitive', 'false'))
         debug_mode = argToBoolean(args.get('debug', 'false'))
+        time_budget = arg_to_number(args.get('time_budget'))
 
-        # Handle array argument - argToList handles both single value and list
-        instance_ids = argToList(instance_ids_arg)
+        # Handle array argument - argToList handles both single value and list.
+        # Duplicates are coalesced so each instance is only fetched once per run.
+        instance_ids = list(dict.fromkeys(argToList(instance_ids_arg)))
 
         debug_info = []
         debug_info.append(f"Arguments - instance_ids: {instance_ids}, filter_keyword: {filter_keyword}, case_sensitive: {case_sensitive}")
@@ -251,18 +581,29 @@ def main():
             return_error("instance_ids is required")
             return
 
+        if time_budget is not None and time_budget < PAGE_TIME_ESTIMATE_SECONDS:
+            return_error(f"time_budget must be at least {PAGE_TIME_ESTIMATE_SECONDS} seconds")
+            return
+
         # Parse filter expression
         filter_type, filter_value = parse_filter(filter_keyword)
         debug_info.append(f"Parsed filter - type: {filter_type}, value: {filter_value}")
 
         # Fetch accounts from all instances
+        deadline = time.time() + time_budget if time_budget else None
+        run_id = str(uuid.uuid4())
         all_accounts = []
+        incomplete_instances = []
         for instance_id in instance_ids:
             debug_info.append(f"--- Fetching from instance: {instance_id} ---")
             try:
-                accounts = get_accounts_for_instance(instance_id, debug_info if debug_mode else None)
-                debug_info.append(f"Instance {instance_id}: fetched {len(accounts)} accounts")
+                accounts, complete = fetch_accounts_single_flight(instance_id, run_id, deadline,
+                                                                  debug_info if debug_mode else None)
+                debug_info.append(f"Instance {instance_id}: fetched {len(accounts)} accounts"
+                                  + ("" if complete else " (partial)"))
                 all_accounts.extend(accounts)
+                if not complete:
+                    incomplete_instances.append(instance_id)
             except Exception as ex:
                 debug_info.append(f"Instance {instance_id}: ERROR - {str(ex)}")
                 demisto.debug(f"Error fetching accounts for instance {instance_id}: {ex}")
@@ -283,7 +624,8 @@ def main():
 
         # Build readable output
         output = build_output(instance_ids, filter_keyword, case_sensitive,
-                              len(account_ids), account_ids, account_names, debug_mode)
+                              len(account_ids), account_ids, account_names, debug_mode,
+                              incomplete_instances)
 
         # Append debug info if debug mode is enabled
         if debug_mode:
@@ -301,7 +643,9 @@ def main():
                 'case_sensitive': case_sensitive,
                 'results_count': len(account_ids),
                 'values': account_ids,
-                'account_names': account_names
+                'account_names': account_names,
+                'partial': bool(incomplete_instances),
+                'incomplete_instances': incomplete_instances
             },
             readable_output=output
         ))
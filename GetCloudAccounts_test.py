@@ -0,0 +1,352 @@
+"""Unit tests for GetCloudAccounts.
+
+The script relies on globals injected by the Cortex runtime (demisto and the
+CommonServerPython helpers), so the module is loaded with fakes for them.
+"""
+
+import importlib.util
+import json
+import os
+import types
+
+import pytest
+
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'GetCloudAccounts.py')
+
+
+class DemistoException(Exception):
+    pass
+
+
+class FakeContext:
+    """Versioned integration context, like the one CommonServerPython exposes."""
+
+    def __init__(self):
+        self.data = {}
+        self.version = 0
+        self.before_set = None  # Hook to interleave another run between read and write
+
+    def get(self, sync=True, with_version=False):
+        data = json.loads(json.dumps(self.data))
+        return (data, self.version) if with_version else data
+
+    def set(self, context, sync=True, version=-1):
+        if self.before_set:
+            hook, self.before_set = self.before_set, None
+            hook()
+        if version != -1 and version != self.version:
+            raise ValueError(f"Version mismatch: {version} != {self.version}")
+        self.data = json.loads(json.dumps(context))
+        self.version += 1
+
+
+class FakeApi:
+    """Paginated cloud_onboarding/get_accounts endpoint."""
+
+    def __init__(self, total):
+        self.accounts = [{'cloud_account_id': f'id-{i}', 'account_name': f'acc-{i}', 'extra': 'x'}
+                         for i in range(total)]
+        self.requests = []
+        self.on_request = None
+
+    def execute_command(self, command, args):
+        paging = json.loads(args['body'])['request_data']['filter_data']['paging']
+        self.requests.append(paging['from'])
+        if self.on_request:
+            self.on_request(paging['from'])
+        data = self.accounts[paging['from']:paging['to']]
+        return [{'Type': 1, 'Contents': {'reply': {'DATA': data, 'TOTAL_COUNT': len(self.accounts)}}}]
+
+
+class Clock:
+    """Fake time source so lease and deadline logic can be driven deterministically."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.on_sleep = None
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        if self.on_sleep:
+            self.on_sleep()
+
+
+@pytest.fixture
+def env():
+    context = FakeContext()
+    api = FakeApi(250)
+    clock = Clock()
+    args = {}
+    results = []
+
+    spec = importlib.util.spec_from_file_location('GetCloudAccounts', SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    module.__dict__.update(
+        demisto=types.SimpleNamespace(
+            executeCommand=lambda command, args: api.execute_command(command, args),
+            args=lambda: args,
+            debug=lambda msg: None,
+            error=lambda msg: None,
+        ),
+        get_integration_context=context.get,
+        set_integration_context=context.set,
+        is_error=lambda res: False,
+        get_error=lambda res: '',
+        DemistoException=DemistoException,
+        argToBoolean=lambda value: str(value).lower() == 'true',
+        argToList=lambda value: value if isinstance(value, list) else [value] if value else [],
+        arg_to_number=lambda value: int(value) if value not in (None, '') else None,
+        return_error=lambda msg: results.append({'error': msg}),
+        return_results=results.append,
+        CommandResults=lambda **kwargs: kwargs,
+    )
+    spec.loader.exec_module(module)
+    module.time = types.SimpleNamespace(time=clock.time, sleep=clock.sleep)
+    module.random = types.SimpleNamespace(uniform=lambda a, b: 0)
+
+    return types.SimpleNamespace(module=module, context=context, api=api, clock=clock,
+                                 args=args, results=results)
+
+
+# ============================================================================
+# SINGLE-FLIGHT
+# ============================================================================
+
+def test_acquire_lease_race_has_single_owner(env):
+    """A run that loses the race between its read and write must not also own the lease."""
+    env.context.before_set = lambda: env.module.acquire_lease('inst', 'run-b')
+
+    assert env.module.acquire_lease('inst', 'run-a') is False
+    assert env.module.load_instance_state('inst')['lease']['owner'] == 'run-b'
+
+
+def test_update_preserves_other_instances(env):
+    """A concurrent write for another instance survives the version conflict retry."""
+    env.context.before_set = lambda: env.module.release_lease('other', 'run-b', env.api.accounts[:1])
+
+    assert env.module.acquire_lease('inst', 'run-a') is True
+    assert env.module.load_instance_state('other')['result']['accounts']
+    assert env.module.load_instance_state('inst')['lease']['owner'] == 'run-a'
+
+
+def test_update_gives_up_after_repeated_conflicts(env):
+    def conflict(*args, **kwargs):
+        raise ValueError('Version mismatch')
+    env.module.set_integration_context = conflict
+
+    with pytest.raises(DemistoException):
+        env.module.acquire_lease('inst', 'run-a')
+
+
+def test_holder_publishes_compact_result(env):
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-a')
+
+    assert complete and len(accounts) == 250
+    state = env.module.load_instance_state('inst')
+    assert 'lease' not in state
+    assert state['result']['accounts'][0] == {'cloud_account_id': 'id-0', 'account_name': 'acc-0'}
+
+
+def test_published_result_is_reused(env):
+    env.module.fetch_accounts_single_flight('inst', 'run-a')
+    env.api.requests.clear()
+
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-b')
+
+    assert complete and len(accounts) == 250
+    assert env.api.requests == []
+
+
+def test_holder_renews_lease_every_page(env):
+    expiries = []
+
+    def slow_page(offset):
+        env.clock.now += 40
+        expiries.append(env.module.load_instance_state('inst')['lease']['expires'])
+    env.api.on_request = slow_page
+
+    env.module.fetch_accounts_single_flight('inst', 'run-a')
+
+    # Each page starts with a lease renewed after the previous one
+    assert expiries[1] - expiries[0] == 40 and expiries[2] - expiries[1] == 40
+
+
+def test_waiter_waits_while_lease_is_renewed(env):
+    """A slow holder keeps waiters waiting far beyond a single lease TTL."""
+    module = env.module
+    module.acquire_lease('inst', 'run-a')
+    steps = iter(range(10))
+
+    def holder_progress():
+        step = next(steps)
+        env.clock.now += 30
+        if step < 9:
+            module.renew_lease('inst', 'run-a')
+        else:
+            module.release_lease('inst', 'run-a', env.api.accounts)
+    env.clock.on_sleep = holder_progress
+
+    accounts, complete = module.fetch_accounts_single_flight('inst', 'run-b')
+
+    assert complete and len(accounts) == 250
+    assert env.api.requests == []
+
+
+def test_waiter_takes_over_expired_lease(env):
+    env.module.acquire_lease('inst', 'run-a')
+
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-b')
+
+    assert complete and len(accounts) == 250
+    assert env.clock.now >= 1_000_000.0 + env.module.LEASE_TTL_SECONDS
+    assert env.module.load_instance_state('inst')['result']['accounts']
+
+
+def test_coordination_failure_falls_back_to_direct_fetch(env):
+    def broken(*args, **kwargs):
+        raise RuntimeError('context unavailable')
+    env.module.get_integration_context = broken
+
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-a')
+
+    assert complete and len(accounts) == 250
+
+
+def test_api_error_is_not_retried_as_coordination_failure(env):
+    env.module.is_error = lambda res: True
+
+    with pytest.raises(DemistoException):
+        env.module.fetch_accounts_single_flight('inst', 'run-a')
+    assert len(env.api.requests) == 1
+    assert 'lease' not in env.module.load_instance_state('inst')
+
+
+def test_main_coalesces_duplicate_instance_ids(env):
+    env.args.update(instance_ids=['inst', 'inst'], filter_keyword='acc-1')
+
+    env.module.main()
+
+    outputs = env.results[-1]['outputs']
+    assert outputs['instance_ids'] == ['inst']
+    assert env.api.requests == [0, 100, 200]
+    assert len(outputs['values']) == len(set(outputs['values']))
+
+
+# ============================================================================
+# DEADLINE AND CHECKPOINTS
+# ============================================================================
+
+def account_ids(accounts):
+    return [acc['cloud_account_id'] for acc in accounts]
+
+
+def slow_pages(env, seconds=10):
+    env.api.on_request = lambda offset: setattr(env.clock, 'now', env.clock.now + seconds)
+
+
+def test_deadline_saves_compact_checkpoint_and_resumes(env):
+    slow_pages(env)
+
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-a', deadline=env.clock.now + 25)
+
+    assert not complete and len(accounts) == 200
+    state = env.module.load_instance_state('inst')
+    assert 'result' not in state
+    assert state['checkpoint']['offset'] == 200
+    assert state['checkpoint']['total_count'] == 250
+    assert state['checkpoint']['accounts'][0] == {'cloud_account_id': 'id-0', 'account_name': 'acc-0'}
+
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-b')
+
+    assert complete and account_ids(accounts) == account_ids(env.api.accounts)
+    assert env.api.requests == [0, 100, 200]
+    assert 'checkpoint' not in env.module.load_instance_state('inst')
+
+
+def test_exhausted_deadline_still_fetches_one_page(env):
+    slow_pages(env)
+    past_deadline = env.clock.now - 1
+
+    for expected_offset in (100, 200):
+        accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-a', deadline=past_deadline)
+        assert not complete
+        assert env.module.load_instance_state('inst')['checkpoint']['offset'] == expected_offset
+
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-a', deadline=past_deadline)
+    assert complete and len(accounts) == 250
+
+
+def test_resume_restarts_when_total_changes(env):
+    slow_pages(env)
+    env.module.fetch_accounts_single_flight('inst', 'run-a', deadline=env.clock.now + 5)
+    env.api.accounts.insert(0, {'cloud_account_id': 'new', 'account_name': 'new'})
+
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-a')
+
+    assert complete and account_ids(accounts) == account_ids(env.api.accounts)
+    assert env.api.requests == [0, 100, 0, 100, 200]
+
+
+def test_resume_dedupes_shifted_accounts(env):
+    slow_pages(env)
+    env.module.fetch_accounts_single_flight('inst', 'run-a', deadline=env.clock.now + 5)
+    # Same total, but one account added before the checkpoint offset shifts the pages
+    env.api.accounts.insert(0, {'cloud_account_id': 'new', 'account_name': 'new'})
+    env.api.accounts.pop()
+
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-a')
+
+    ids = account_ids(accounts)
+    assert complete and len(ids) == len(set(ids))
+
+
+def test_waiter_without_lease_does_not_touch_checkpoint(env):
+    env.module.acquire_lease('inst', 'run-a')
+    env.module.update_instance_state('inst', lambda state: state.update(
+        checkpoint={'offset': 200, 'accounts': [], 'total_count': 250, 'saved': env.clock.now}))
+    # Keep the holder's lease alive while the waiter runs out of time
+    env.clock.on_sleep = lambda: env.module.renew_lease('inst', 'run-a')
+
+    accounts, complete = env.module.fetch_accounts_single_flight('inst', 'run-b', deadline=env.clock.now + 5)
+
+    assert env.api.requests[0] == 0
+    assert env.module.load_instance_state('inst')['checkpoint']['offset'] == 200
+
+
+def test_run_that_lost_lease_does_not_save_checkpoint(env):
+    env.module.acquire_lease('inst', 'run-a')
+
+    def lose_lease(offset):
+        env.clock.now += 10
+        env.module.update_instance_state('inst', lambda state: state.update(
+            lease={'owner': 'run-b', 'expires': env.clock.now + 60}))
+    env.api.on_request = lose_lease
+
+    env.module.fetch_accounts_with_checkpoint('inst', 'run-a', deadline=env.clock.now + 5)
+
+    assert 'checkpoint' not in env.module.load_instance_state('inst')
+
+
+def test_main_reports_partial_result(env):
+    slow_pages(env, seconds=20)
+    env.args.update(instance_ids=['inst'], time_budget='30')
+
+    env.module.main()
+
+    outputs = env.results[-1]['outputs']
+    assert outputs['partial'] is True
+    assert outputs['incomplete_instances'] == ['inst']
+    assert 'Partial Result' in env.results[-1]['readable_output']
+
+
+def test_main_rejects_time_budget_below_page_estimate(env):
+    env.args.update(instance_ids=['inst'], time_budget='2')
+
+    env.module.main()
+
+    assert 'time_budget' in env.results[-1]['error']
+    assert env.api.requests == []